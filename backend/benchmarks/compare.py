@@ -0,0 +1,50 @@
+"""
+Compares two benchmark result files, e.g. from two commits.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.compare before.json after.json [--threshold 10]
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent change reported as a regression")
+    args = parser.parse_args()
+    
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    
+    before_sizes = {(size["users"], size["activities"]): size for size in before["sizes"]}
+    regressions = 0
+    
+    for size in after["sizes"]:
+        key = (size["users"], size["activities"])
+        if key not in before_sizes:
+            continue
+        
+        print(f"{key[0]} users x {key[1]} activities")
+        for scenario, new in size["scenarios"].items():
+            old = before_sizes[key]["scenarios"].get(scenario)
+            if old is None:
+                continue
+            
+            for metric in METRICS:
+                change = (new[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0.0
+                # Higher throughput is better, higher latency is worse
+                worse = -change if metric == "throughput_rps" else change
+                flag = " REGRESSION" if worse > args.threshold else ""
+                regressions += bool(flag)
+                print(f"  {scenario:10} {metric:15} {old[metric]:10.2f} -> {new[metric]:10.2f} ({change:+.1f}%){flag}")
+    
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Parity and throughput comparison of the embedding backends (see core/embedding_model.py).
+
+Encodes the same synthetic interest lists with the PyTorch reference model and the quantized
+ONNX model, reports cosine agreement of the averaged embeddings (what get_embeddings returns)
+and encoding throughput for several thread counts. Exits with status 1 when the mean cosine
+agreement is below --min-cosine, so it can gate a model or backend change.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.embedding_backends --lists 1000 --threads 1,2,4
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+def encode_lists(model, lists: list[list[str]]) -> np.ndarray:
+    return np.array([np.mean(model.encode(items), axis=0) for items in lists])
+
+def throughput(model, lists: list[list[str]]) -> float:
+    # Warm up so lazy initialisation isn't measured
+    encode_lists(model, lists[:10])
+    start = time.perf_counter()
+    encode_lists(model, lists)
+    return len(lists) / (time.perf_counter() - start)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare embedding backends")
+    parser.add_argument("--lists", type=int, default=1000, help="Number of interest lists to encode")
+    parser.add_argument("--threads", default="0", help="Comma separated intra-op thread counts, 0 = runtime default")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    from ..core.embedding_model import load_model
+    from .seed import TAGS
+    
+    rng = random.Random(args.seed)
+    lists = [rng.sample(TAGS, rng.randint(1, 5)) for _ in range(args.lists)]
+    
+    reference = load_model("torch")
+    candidate = load_model("onnx")
+    
+    expected = encode_lists(reference, lists)
+    actual = encode_lists(candidate, lists)
+    cosine = np.sum(expected * actual, axis=1) / (np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1))
+    
+    results = {
+        "lists": args.lists,
+        "parity": {
+            "mean_cosine": float(cosine.mean()),
+            "min_cosine": float(cosine.min()),
+        },
+        "throughput_lists_per_second": {},
+    }
+    
+    for threads in (int(value) for value in args.threads.split(",")):
+        results["throughput_lists_per_second"][str(threads)] = {
+            backend: throughput(load_model(backend, threads), lists)
+            for backend in ("torch", "onnx")
+        }
+    
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results["parity"]["mean_cosine"] >= args.min_cosine else 1)
+
+if __name__ == "__main__":
+    main()
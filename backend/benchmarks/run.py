@@ -0,0 +1,200 @@
+"""
+Benchmarks the real FastAPI app against a local Postgres with pgvector.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.run --sizes 1000x5000,10000x50000 --output bench.json
+    python -m backend.benchmarks.run --database-url postgresql+asyncpg://... --sizes 1000x5000
+
+Without --database-url a throwaway pgvector container is started with Docker.
+Every scenario reports throughput and p50/p95/p99 latency; results are written as JSON
+and can be diffed between commits with backend.benchmarks.compare.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+def summarize(latencies: list[float], statuses: list[int], wall_seconds: float) -> dict:
+    values = np.array(latencies) * 1000
+    # Requests shed by admission control are counted separately, they'd skew the errors
+    shed = sum(1 for code in statuses if code == 503)
+    errors = sum(1 for code in statuses if code >= 400) - shed
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "shed": shed,
+        "throughput_rps": len(latencies) / wall_seconds if wall_seconds else 0.0,
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+async def drive(make_request, requests: int, concurrency: int) -> dict:
+    """
+    Runs make_request(i) for i in range(requests) with at most `concurrency` in flight.
+    """
+    latencies = []
+    statuses = []
+    counter = iter(range(requests))
+    
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            response = await make_request(i)
+            latencies.append(time.perf_counter() - start)
+            statuses.append(response.status_code)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - start)
+
+async def run_size(client, users: int, activities: int, args) -> dict:
+    from ..models.activity import Activity
+    from ..core.database import AsyncSessionLocal
+    from ..services.auth import AuthService
+    from .seed import PASSWORD, TAGS, reset_schema, seed
+    
+    await reset_schema()
+    seed_start = time.perf_counter()
+    await seed(users, activities, seed=args.seed)
+    seed_seconds = time.perf_counter() - seed_start
+    
+    rng = random.Random(args.seed)
+    tokens = [AuthService.create_access_token({"sub": str(user_id)}) for user_id in range(1, users + 1)]
+    
+    def auth(i: int) -> dict:
+        return {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+    
+    results = {}
+    
+    async def register(i):
+        return await client.post("/auth/register", json={
+            "email": f"new_{i}@bench.local",
+            "username": f"new_user_{i}",
+            "password": PASSWORD,
+            "full_name": "Bench User",
+            "interests": rng.sample(TAGS, 3),
+        })
+    results["register"] = await drive(register, args.requests, args.concurrency)
+    
+    async def login(i):
+        return await client.post("/auth/login", json={"username": f"user_{rng.randrange(users)}", "password": PASSWORD})
+    results["login"] = await drive(login, args.requests, args.concurrency)
+    
+    async def list_activities(i):
+        return await client.get("/activities", params={"skip": rng.randrange(max(activities - 50, 1)), "limit": 50})
+    results["list"] = await drive(list_activities, args.requests, args.concurrency)
+    
+    # Every participant hammers the same activity; lost updates show up in the final count
+    contended_id = 1
+    participants = min(args.concurrency * 4, 100, users - 1)
+    async with AsyncSessionLocal() as db:
+        activity = await db.get(Activity, contended_id)
+        participant_ids = [user_id for user_id in range(1, users + 1) if user_id != activity.host_id][:participants]
+    
+    async def join(i):
+        return await client.post(f"/activities/{contended_id}/join", headers=auth(participant_ids[i] - 1))
+    results["join"] = await drive(join, len(participant_ids), args.concurrency)
+    
+    async with AsyncSessionLocal() as db:
+        activity = await db.get(Activity, contended_id)
+        results["join"]["final_participants"] = len(activity.participants)
+    
+    async def leave(i):
+        return await client.delete(f"/activities/{contended_id}/leave", headers=auth(participant_ids[i] - 1))
+    results["leave"] = await drive(leave, len(participant_ids), args.concurrency)
+    
+    async with AsyncSessionLocal() as db:
+        activity = await db.get(Activity, contended_id)
+        results["leave"]["final_participants"] = len(activity.participants)
+    
+    async def recommend(i):
+        return await client.get("/activities/me/recommend", params={"limit": 5}, headers=auth(rng.randrange(users)))
+    results["recommend"] = await drive(recommend, args.requests, args.concurrency)
+    
+    return {
+        "users": users,
+        "activities": activities,
+        "seed_seconds": seed_seconds,
+        "scenarios": results,
+    }
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def run(args) -> dict:
+    import httpx
+    from ..core.database import engine
+    from ..main import app
+    from .postgres import wait_until_ready
+    
+    await wait_until_ready(os.environ["DATABASE_URL"])
+    
+    sizes = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for size in args.sizes.split(","):
+            users, activities = (int(part) for part in size.lower().split("x"))
+            sizes.append(await run_size(client, users, activities, args))
+    
+    await engine.dispose()
+    
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "admission_control": args.admission_control,
+        "sizes": sizes,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Uplink API against a local Postgres")
+    parser.add_argument("--database-url", help="Use an existing database (its tables are dropped!) instead of Docker")
+    parser.add_argument("--sizes", default="1000x5000", help="Comma separated USERSxACTIVITIES data sizes")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight per scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("--admission-control", action="store_true", help="Keep admission control on (fast 503s then dominate the CPU-heavy scenarios)")
+    args = parser.parse_args()
+    
+    from . import postgres
+    
+    # Settings are read at import time, so configure them before importing the app
+    database_url = args.database_url or postgres.start()
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark-secret")
+    os.environ["DATABASE_ECHO"] = "false"
+    # Measure the endpoints themselves rather than how fast they are shed
+    os.environ["ADMISSION_CONTROL_ENABLED"] = "true" if args.admission_control else "false"
+    
+    try:
+        results = asyncio.run(run(args))
+    finally:
+        if not args.database_url:
+            postgres.stop()
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Creates the schema and seeds synthetic users and activities.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+import bcrypt
+from sqlalchemy import insert, text
+
+from ..core.database import Base, engine, AsyncSessionLocal
+from ..core.embedding_model import get_embeddings_batch
+from ..models.activity import Activity
+from ..models.user import User
+from ..models import embedding_job, tag_embedding  # noqa: F401 - registers the tables on Base.metadata
+
+PASSWORD = "benchmark-password"
+
+TAGS = [
+    "hiking", "running", "cycling", "climbing", "swimming", "yoga", "football", "basketball",
+    "tennis", "chess", "board games", "video games", "photography", "painting", "music",
+    "guitar", "jazz", "concerts", "theatre", "cinema", "reading", "writing", "poetry",
+    "cooking", "baking", "wine tasting", "coffee", "travel", "languages", "volunteering",
+    "startups", "programming", "robotics", "astronomy", "gardening", "dancing", "karaoke",
+    "meditation", "camping", "fishing",
+]
+
+CITIES = ["Bucharest", "Cluj-Napoca", "Iasi", "Timisoara", "Brasov", "Constanta"]
+
+async def reset_schema() -> None:
+    async with engine.begin() as connection:
+        await connection.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+
+def random_tags(rng: random.Random) -> list[str]:
+    return rng.sample(TAGS, rng.randint(2, 5))
+
+async def seed(users: int, activities: int, seed: int = 0, batch_size: int = 1000) -> None:
+    """
+    Inserts users user_0..user_{users-1} (all with PASSWORD) and activities hosted by random users.
+    Embeddings are averaged from per-tag vectors encoded once, so seeding does not run the model per row.
+    """
+    rng = random.Random(seed)
+    tag_vectors = dict(zip(TAGS, get_embeddings_batch([[tag] for tag in TAGS])))
+    hashed_password = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    
+    def embed(tags: list[str]) -> list[float]:
+        vectors = [tag_vectors[tag] for tag in tags]
+        return [sum(values) / len(values) for values in zip(*vectors)]
+    
+    async with AsyncSessionLocal() as db:
+        for start in range(0, users, batch_size):
+            rows = []
+            for i in range(start, min(start + batch_size, users)):
+                interests = random_tags(rng)
+                rows.append({
+                    "email": f"user_{i}@bench.local",
+                    "username": f"user_{i}",
+                    "hashed_password": hashed_password,
+                    "full_name": "Bench User",
+                    "interests": interests,
+                    "country": "Romania",
+                    "city": rng.choice(CITIES),
+                    # Users store the weighted sum of their interests, see UserEmbeddingService
+                    "embedding": [value * len(interests) for value in embed(interests)],
+                    "embedding_weight": float(len(interests)),
+                })
+            await db.execute(insert(User), rows)
+        
+        now = datetime.now(timezone.utc)
+        for start in range(0, activities, batch_size):
+            rows = []
+            for _ in range(start, min(start + batch_size, activities)):
+                tags = random_tags(rng)
+                rows.append({
+                    "host_id": rng.randint(1, users),
+                    "title": f"{tags[0].title()} meetup",
+                    "description": "",
+                    "tags": tags,
+                    "location": rng.choice(CITIES),
+                    "date_time": now + timedelta(days=rng.randint(1, 90)),
+                    "max_participants": 100,
+                    "participants": [],
+                    "status": "active",
+                    "embedding": embed(tags),
+                })
+            await db.execute(insert(Activity), rows)
+        
+        # Fresh statistics so the planner behaves like on a long-lived database
+        await db.execute(text("ANALYZE"))
+        await db.commit()
@@ -0,0 +1,96 @@
+"""
+Admission control for CPU-heavy endpoints.
+
+Each limiter allows a fixed number of requests in flight and a bounded queue behind them.
+A request is rejected with 503 and Retry-After when the queue is full, when its expected
+wait (from a running average of service time) exceeds the deadline, or when it actually
+waits longer than the deadline. Cheap endpoints are not limited, so they keep their
+latency while expensive ones are being shed.
+"""
+import asyncio
+import math
+from time import perf_counter
+
+from fastapi import HTTPException, status
+
+from .config import settings
+from .metrics import record_rejection
+
+class AdmissionLimiter:
+    # Weight of the newest sample in the running service time average
+    SMOOTHING = 0.2
+    
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.waiting = 0
+        self.service_time = 0.0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+    
+    def expected_wait(self) -> float:
+        return (self.waiting + 1) * self.service_time / self.max_concurrent
+    
+    def reject(self, retry_after: float) -> HTTPException:
+        record_rejection(self.name)
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+    
+    async def acquire(self) -> None:
+        if self.in_flight >= self.max_concurrent:
+            if self.waiting >= self.max_queue:
+                raise self.reject(self.expected_wait())
+            
+            # Don't queue a request that would miss its deadline anyway
+            if self.expected_wait() > self.max_wait:
+                raise self.reject(self.expected_wait())
+        
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            raise self.reject(self.expected_wait())
+        finally:
+            self.waiting -= 1
+        
+        self.in_flight += 1
+    
+    def release(self, elapsed: float) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+        self.service_time += AdmissionLimiter.SMOOTHING * (elapsed - self.service_time)
+
+limiters: dict[str, AdmissionLimiter] = {}
+
+def admission(name: str):
+    """
+    Route dependency limiting concurrent requests of the named endpoint, e.g.
+    @router.post("/login", dependencies=[Depends(admission("login"))])
+    """
+    async def dependency():
+        if not settings.ADMISSION_CONTROL_ENABLED:
+            yield
+            return
+        
+        limiter = limiters.get(name)
+        if limiter is None:
+            limiter = limiters[name] = AdmissionLimiter(
+                name,
+                max_concurrent=settings.ADMISSION_MAX_CONCURRENT_OVERRIDES.get(name, settings.ADMISSION_MAX_CONCURRENT),
+                max_queue=settings.ADMISSION_MAX_QUEUE,
+                max_wait=settings.ADMISSION_MAX_WAIT_SECONDS
+            )
+        
+        await limiter.acquire()
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            limiter.release(perf_counter() - start)
+    
+    return dependency
\ No newline at end of file
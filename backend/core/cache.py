@@ -0,0 +1,40 @@
+from collections import OrderedDict
+from time import monotonic
+
+class TTLCache:
+    """
+    Small in-process LRU cache whose entries expire after ttl seconds.
+    """
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+    
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at < monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key, value) -> None:
+        self._entries[key] = (monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+    
+    def invalidate(self, predicate) -> None:
+        """
+        Drops every entry whose key matches predicate(key).
+        """
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
\ No newline at end of file
@@ -1,9 +1,47 @@
 from pydantic_settings import BaseSettings
+from typing import Literal
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
     JWT_SECRET_KEY: str
+    DATABASE_ECHO: bool = True
+    
+    # Embeddings
+    # When enabled, writes commit with embedding = NULL and the row is queued
+    # for the background worker (python -m backend.jobs.embedding_worker)
+    EMBEDDING_ASYNC: bool = False
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_POLL_INTERVAL_SECONDS: float = 1.0
+    # "halfvec" stores embeddings as float16, halving table size, see README for the migration
+    EMBEDDING_STORAGE: Literal["vector", "halfvec"] = "vector"
+    # Inference backend, see core/embedding_model.py. All our nodes are CPU only
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: Literal["torch", "onnx"] = "torch"
+    EMBEDDING_ONNX_FILE: str = "onnx/model_qint8_avx2.onnx"
+    EMBEDDING_INTRA_OP_THREADS: int = 0
+    # Weight of a joined activity in the user embedding, relative to one interest (0 ignores joins)
+    USER_EMBEDDING_JOIN_WEIGHT: float = 1.0
+    # Process-local copy of tag_embeddings (see UserEmbeddingService.tag_vectors)
+    TAG_EMBEDDING_CACHE_SIZE: int = 10000
+    TAG_EMBEDDING_CACHE_TTL_SECONDS: float = 3600.0
+    
+    # "People like you" matching (GET /users/me/similar)
+    SIMILAR_USERS_CACHE_SIZE: int = 10000
+    SIMILAR_USERS_CACHE_TTL_SECONDS: float = 300.0
+    # Keep scanning the HNSW index until enough rows pass the city/country filter (ignored before pgvector 0.8)
+    SIMILAR_USERS_ITERATIVE_SCAN: bool = True
+    
+    # Archival of past activities (python -m backend.jobs.archive_activities)
+    ACTIVITY_ARCHIVE_BATCH_SIZE: int = 1000
+    
+    # Admission control for CPU-heavy endpoints (bcrypt, embedding model)
+    # Limiter names: register, login, create_user, update_user, create_activity, update_activity
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENT: int = 2
+    ADMISSION_MAX_CONCURRENT_OVERRIDES: dict[str, int] = {"login": 4}
+    ADMISSION_MAX_QUEUE: int = 16
+    ADMISSION_MAX_WAIT_SECONDS: float = 2.0
     
     class Config:
         env_file = "./backend/.env"
@@ -1,11 +1,40 @@
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from pgvector.sqlalchemy import HALFVEC, Vector
+from time import perf_counter
 from .config import settings
+from .metrics import record_query
 
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
+engine = create_async_engine(settings.DATABASE_URL, echo=settings.DATABASE_ECHO)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autoflush=False, autocommit=False)
 Base = declarative_base()
 
+EMBEDDING_DIMENSIONS = 384
+
+def embedding_type():
+    """
+    Column type of User.embedding and Activity.embedding, chosen by EMBEDDING_STORAGE.
+    """
+    if settings.EMBEDDING_STORAGE == "halfvec":
+        return HALFVEC(EMBEDDING_DIMENSIONS)
+    return Vector(EMBEDDING_DIMENSIONS)
+
+def embedding_cosine_ops() -> str:
+    """
+    Operator class for cosine distance indexes on embedding_type() columns.
+    """
+    return f"{settings.EMBEDDING_STORAGE}_cosine_ops"
+
+# Per-request query count and DB time, see core/metrics.py
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_start"] = perf_counter()
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_query(perf_counter() - conn.info.pop("query_start", perf_counter()))
+
 async def get_db():
     """
     Creates an async database session for each request and closes it when done.
@@ -1,10 +1,65 @@
 from sentence_transformers import SentenceTransformer
 import numpy as np
+import threading
+from .config import settings
+from .metrics import timed
 
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+def load_model(backend: str, intra_op_threads: int = 0) -> SentenceTransformer:
+    """
+    Loads EMBEDDING_MODEL with the given backend:
+        torch - full precision PyTorch (the reference)
+        onnx  - int8-quantized ONNX Runtime model (EMBEDDING_ONNX_FILE), needs sentence-transformers[onnx]
+    intra_op_threads = 0 keeps the runtime's default (one thread per core).
+    """
+    if backend == "onnx":
+        import onnxruntime
+        
+        session_options = onnxruntime.SessionOptions()
+        if intra_op_threads:
+            session_options.intra_op_num_threads = intra_op_threads
+        
+        return SentenceTransformer(
+            settings.EMBEDDING_MODEL,
+            backend="onnx",
+            model_kwargs={
+                "file_name": settings.EMBEDDING_ONNX_FILE,
+                "provider": "CPUExecutionProvider",
+                "session_options": session_options,
+            },
+        )
+    
+    if intra_op_threads:
+        import torch
+        torch.set_num_threads(intra_op_threads)
+    
+    return SentenceTransformer(settings.EMBEDDING_MODEL)
+
+embedding_model = load_model(settings.EMBEDDING_BACKEND, settings.EMBEDDING_INTRA_OP_THREADS)
+
+# Requests encode from the threadpool and the tokenizer is not safe for concurrent use
+_model_lock = threading.Lock()
 
 def get_embeddings(list: list[str]) -> list[float]:
-    embeddings = embedding_model.encode(list)
+    with timed("embedding_seconds"), _model_lock:
+        embeddings = embedding_model.encode(list)
     avg_embedding = np.mean(embeddings, axis=0)
     
-    return avg_embedding.tolist()
\ No newline at end of file
+    return avg_embedding.tolist()
+
+def get_embeddings_batch(groups: list[list[str]]) -> list[list[float]]:
+    """
+    Averages the embeddings of several lists of strings with a single model call.
+    """
+    if not groups:
+        return []
+    
+    flat = [text for group in groups for text in group]
+    with timed("embedding_seconds"), _model_lock:
+        embeddings = embedding_model.encode(flat)
+    
+    # Start offset of every group inside the flat array
+    offsets = np.cumsum([0] + [len(group) for group in groups[:-1]])
+    sums = np.add.reduceat(embeddings, offsets, axis=0)
+    counts = np.array([len(group) for group in groups], dtype=np.float32)[:, None]
+    
+    return (sums / counts).tolist()
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""
+Offline geocoding and geohash helpers for proximity filtering.
+
+Locations are resolved against a bundled gazetteer (core/data/gazetteer.csv), no network calls.
+Activities store a geohash next to latitude/longitude; a radius query is turned into a
+bounding box, the geohash cells covering it (prefix scans on a B-tree index) and an exact
+great-circle distance check, all in SQL.
+"""
+import csv
+import math
+import unicodedata
+from pathlib import Path
+
+EARTH_RADIUS_KM = 6371.0
+GEOHASH_PRECISION = 9
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def normalize(name: str) -> str:
+    # "  Timișoara " -> "timisoara"
+    decomposed = unicodedata.normalize("NFKD", name)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).strip().lower()
+
+def load_gazetteer() -> dict[str, tuple[float, float]]:
+    with open(Path(__file__).parent / "data" / "gazetteer.csv", newline="") as f:
+        return {normalize(row["name"]): (float(row["latitude"]), float(row["longitude"])) for row in csv.DictReader(f)}
+
+gazetteer = load_gazetteer()
+
+def lookup(location: str) -> tuple[float, float] | None:
+    """
+    Resolves a free-text location to (latitude, longitude), trying the whole string
+    and then each comma separated part ("Central Park, Cluj-Napoca, Romania").
+    """
+    candidates = [location] + location.split(",")
+    for candidate in candidates:
+        point = gazetteer.get(normalize(candidate))
+        if point is not None:
+            return point
+    return None
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    value = 0
+    even = True
+    
+    while len(geohash) < precision:
+        # Bits alternate between longitude and latitude, starting with longitude
+        target, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (target[0] + target[1]) / 2
+        if coordinate >= middle:
+            value = (value << 1) | 1
+            target[0] = middle
+        else:
+            value = value << 1
+            target[1] = middle
+        even = not even
+        bits += 1
+        
+        if bits == 5:
+            geohash.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    
+    return "".join(geohash)
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """
+    (height, width) in degrees of a geohash cell of the given precision.
+    """
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> tuple[float, float, float, float]:
+    """
+    (min_lat, max_lat, min_lon, max_lon) enclosing the circle, clamped to valid coordinates.
+    """
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    # Longitude degrees shrink towards the poles
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    delta_lon = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+    return (
+        max(latitude - delta_lat, -90.0),
+        min(latitude + delta_lat, 90.0),
+        max(longitude - delta_lon, -180.0),
+        min(longitude + delta_lon, 180.0),
+    )
+
+def covering_cells(box: tuple[float, float, float, float]) -> list[str]:
+    """
+    Geohash prefixes whose cells cover the box: the finest precision whose cells are at least
+    as large as the box, so its four corners fall into at most four cells.
+    Returns [] when the box is too large for any prefix to narrow the search.
+    """
+    min_lat, max_lat, min_lon, max_lon = box
+    precision = 0
+    while precision < GEOHASH_PRECISION:
+        height, width = cell_size(precision + 1)
+        if height < max_lat - min_lat or width < max_lon - min_lon:
+            break
+        precision += 1
+    
+    if precision == 0:
+        return []
+    
+    corners = [(min_lat, min_lon), (min_lat, max_lon), (max_lat, min_lon), (max_lat, max_lon)]
+    return sorted({encode_geohash(lat, lon, precision) for lat, lon in corners})
+
+def parse_point(value: str) -> tuple[float, float]:
+    """
+    Parses "lat,lon", raising ValueError when it isn't a valid coordinate.
+    """
+    latitude, longitude = (float(part) for part in value.split(","))
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("Coordinates out of range")
+    return latitude, longitude
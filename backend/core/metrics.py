@@ -0,0 +1,174 @@
+"""
+Lightweight per-request performance instrumentation.
+
+RequestMetrics collects DB, embedding and bcrypt time for the request being served
+(held in a ContextVar so concurrent requests don't mix). MetricsMiddleware reports
+them as a Server-Timing header and aggregates per-route latency into Prometheus
+histograms rendered by render_prometheus().
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from bisect import bisect_left
+
+class RequestMetrics:
+    __slots__ = ("db_queries", "db_seconds", "embedding_seconds", "bcrypt_seconds")
+    
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.embedding_seconds = 0.0
+        self.bcrypt_seconds = 0.0
+
+current_metrics: ContextVar[RequestMetrics | None] = ContextVar("current_metrics", default=None)
+
+@contextmanager
+def timed(field: str):
+    """
+    Adds the time spent in the block to the given RequestMetrics field, e.g. timed("bcrypt_seconds").
+    Does nothing outside of a request (workers, CLIs).
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        setattr(metrics, field, getattr(metrics, field) + perf_counter() - start)
+
+def record_query(seconds: float) -> None:
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.db_queries += 1
+        metrics.db_seconds += seconds
+
+class Histogram:
+    # Request latency buckets in seconds
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    
+    __slots__ = ("counts", "sum", "count")
+    
+    def __init__(self):
+        self.counts = [0] * len(Histogram.BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, value: float) -> None:
+        # Non-cumulative per-bucket counts, cumulated when rendering
+        index = bisect_left(Histogram.BUCKETS, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+class RouteStats:
+    __slots__ = ("latency", "db_queries", "db_seconds", "embedding_seconds", "bcrypt_seconds")
+    
+    def __init__(self):
+        self.latency = Histogram()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.embedding_seconds = 0.0
+        self.bcrypt_seconds = 0.0
+
+# (method, route template, status code) -> RouteStats
+route_stats: dict[tuple[str, str, int], RouteStats] = {}
+
+def observe_request(method: str, route: str, status_code: int, seconds: float, metrics: RequestMetrics) -> None:
+    key = (method, route, status_code)
+    stats = route_stats.get(key)
+    if stats is None:
+        stats = route_stats[key] = RouteStats()
+    
+    stats.latency.observe(seconds)
+    stats.db_queries += metrics.db_queries
+    stats.db_seconds += metrics.db_seconds
+    stats.embedding_seconds += metrics.embedding_seconds
+    stats.bcrypt_seconds += metrics.bcrypt_seconds
+
+# limiter name -> requests rejected by admission control
+rejections: dict[str, int] = {}
+
+def record_rejection(limiter: str) -> None:
+    rejections[limiter] = rejections.get(limiter, 0) + 1
+
+def server_timing(metrics: RequestMetrics, total_seconds: float) -> str:
+    return ", ".join([
+        f'db;dur={metrics.db_seconds * 1000:.2f};desc="{metrics.db_queries} queries"',
+        f"embedding;dur={metrics.embedding_seconds * 1000:.2f}",
+        f"bcrypt;dur={metrics.bcrypt_seconds * 1000:.2f}",
+        f"total;dur={total_seconds * 1000:.2f}",
+    ])
+
+def render_prometheus() -> str:
+    lines = [
+        "# HELP uplink_request_duration_seconds Request latency by route",
+        "# TYPE uplink_request_duration_seconds histogram",
+    ]
+    for (method, route, status_code), stats in route_stats.items():
+        labels = f'method="{method}",route="{route}",status="{status_code}"'
+        cumulative = 0
+        for bound, count in zip(Histogram.BUCKETS, stats.latency.counts):
+            cumulative += count
+            lines.append(f'uplink_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'uplink_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.latency.count}')
+        lines.append(f"uplink_request_duration_seconds_sum{{{labels}}} {stats.latency.sum}")
+        lines.append(f"uplink_request_duration_seconds_count{{{labels}}} {stats.latency.count}")
+    
+    counters = (
+        ("uplink_db_queries_total", "db_queries", "Database queries by route"),
+        ("uplink_db_seconds_total", "db_seconds", "Time spent in the database by route"),
+        ("uplink_embedding_seconds_total", "embedding_seconds", "Time spent computing embeddings by route"),
+        ("uplink_bcrypt_seconds_total", "bcrypt_seconds", "Time spent hashing passwords by route"),
+    )
+    for name, field, description in counters:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} counter")
+        for (method, route, status_code), stats in route_stats.items():
+            labels = f'method="{method}",route="{route}",status="{status_code}"'
+            lines.append(f"{name}{{{labels}}} {getattr(stats, field)}")
+    
+    lines.append("# HELP uplink_admission_rejected_total Requests shed by admission control")
+    lines.append("# TYPE uplink_admission_rejected_total counter")
+    for limiter, count in rejections.items():
+        lines.append(f'uplink_admission_rejected_total{{limiter="{limiter}"}} {count}')
+    
+    return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware (cheaper than BaseHTTPMiddleware, which adds a task per request).
+    """
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = perf_counter()
+        status_code = 500
+        
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(metrics, perf_counter() - start).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_metrics.reset(token)
+            # Use the route template so /activities/1 and /activities/2 share a series
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            observe_request(scope["method"], route_path, status_code, perf_counter() - start, metrics)
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+Marks activities whose date_time has passed as finished, in batches, so the
+active set scanned by recommendations stays small. With --move, finished
+activities are also moved to the activities_archive table.
+
+Usage (from the repository root):
+    python -m backend.jobs.archive_activities [--move] [--every SECONDS]
+"""
+import argparse
+import asyncio
+import logging
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..services.activity import ActivityService
+
+logger = logging.getLogger(__name__)
+
+async def drain(step, batch_size: int) -> int:
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            count = await step(db, batch_size)
+        
+        if not count:
+            return total
+        total += count
+
+async def archive(move: bool, batch_size: int) -> None:
+    finished = await drain(ActivityService.finish_past_activities, batch_size)
+    logger.info("Marked %d past activities as finished", finished)
+    
+    if move:
+        moved = await drain(ActivityService.move_finished_activities, batch_size)
+        logger.info("Moved %d finished activities to the archive", moved)
+
+async def run(move: bool, batch_size: int, every: float | None) -> None:
+    while True:
+        await archive(move, batch_size)
+        if every is None:
+            return
+        await asyncio.sleep(every)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive activities whose date has passed")
+    parser.add_argument("--move", action="store_true", help="Also move finished activities to activities_archive")
+    parser.add_argument("--batch-size", type=int, default=settings.ACTIVITY_ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--every", type=float, help="Keep running, archiving every SECONDS (default: run once, e.g. from cron)")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.move, args.batch_size, args.every))
+
+if __name__ == "__main__":
+    main()
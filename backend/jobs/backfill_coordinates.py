@@ -0,0 +1,47 @@
+"""
+Resolves latitude, longitude and geohash for activities stored before proximity filtering,
+or after the gazetteer (core/data/gazetteer.csv) has been extended.
+
+Usage (from the repository root):
+    python -m backend.jobs.backfill_coordinates [--all] [--batch-size N]
+"""
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.orm import defer
+
+from ..models.activity import Activity, ActivityArchive
+from ..services.activity import ActivityService
+from .batches import id_batches
+
+logger = logging.getLogger(__name__)
+
+async def backfill(model, batch_size: int, all_rows: bool) -> int:
+    conditions = [] if all_rows else [model.geohash.is_(None)]
+    total = 0
+    async for db, ids in id_batches(model, batch_size, *conditions):
+        result = await db.execute(select(model).options(defer(model.embedding)).where(model.id.in_(ids)))
+        for activity in result.scalars():
+            ActivityService.set_coordinates(activity)
+        total += len(ids)
+        logger.info("Resolved coordinates for %d %s rows", total, model.__tablename__)
+    
+    return total
+
+async def run(batch_size: int, all_rows: bool) -> None:
+    for model in (Activity, ActivityArchive):
+        await backfill(model, batch_size, all_rows)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fill latitude, longitude and geohash of existing activities")
+    parser.add_argument("--all", action="store_true", help="Re-resolve every row, not only rows without a geohash")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.batch_size, args.all))
+
+if __name__ == "__main__":
+    main()
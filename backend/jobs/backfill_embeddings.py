@@ -0,0 +1,70 @@
+"""
+Re-embeds every activity (archived ones included) and then every user, e.g. after switching the embedding model.
+
+Usage (from the repository root):
+    python -m backend.jobs.backfill_embeddings [--only activities|archive|users] [--batch-size N]
+"""
+import argparse
+import asyncio
+import logging
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..models.activity import Activity, ActivityArchive
+from ..models.tag_embedding import TagEmbedding
+from ..models.user import User
+from ..services.embedding import EmbeddingService
+from ..services.user_embedding import UserEmbeddingService
+from .batches import id_batches
+
+logger = logging.getLogger(__name__)
+
+# In run order: users are rebuilt from the embeddings of their joined activities, archived ones included
+TARGETS = {
+    "activities": Activity,
+    "archive": ActivityArchive,
+    "users": User,
+}
+
+async def embed(db: AsyncSession, model, ids: list[int]) -> None:
+    if model is User:
+        await UserEmbeddingService.recompute_users(db, ids)
+    else:
+        await EmbeddingService.embed_rows(db, model, "tags", ids)
+
+async def backfill(model, batch_size: int) -> int:
+    total = 0
+    async for db, ids in id_batches(model, batch_size):
+        await embed(db, model, ids)
+        total += len(ids)
+        logger.info("Re-embedded %d %s rows", total, model.__tablename__)
+    
+    return total
+
+async def run(targets: list[str], batch_size: int) -> None:
+    # Cached tag vectors come from the previous model
+    if "users" in targets:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(TagEmbedding))
+            await db.commit()
+        UserEmbeddingService.tag_cache.clear()
+    
+    for target, model in TARGETS.items():
+        if target in targets:
+            await backfill(model, batch_size)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-embed every user and activity")
+    parser.add_argument("--only", choices=list(TARGETS), help="Only re-embed one table")
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    targets = [args.only] if args.only else list(TARGETS)
+    asyncio.run(run(targets, args.batch_size))
+
+if __name__ == "__main__":
+    main()
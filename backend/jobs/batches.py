@@ -0,0 +1,29 @@
+"""
+Primary key batching shared by the maintenance jobs.
+"""
+from sqlalchemy import select
+
+from ..core.database import AsyncSessionLocal
+
+async def id_batches(model, batch_size: int, *conditions):
+    """
+    Yields (db, ids) for the rows of model matching conditions, batch_size ids at a time in
+    primary key order, each batch in its own session. The session is committed once the
+    caller is done with the batch.
+    """
+    last_id = 0
+    
+    # Walk the table by primary key so every batch is a cheap index range scan
+    while True:
+        async with AsyncSessionLocal() as db:
+            query = select(model.id).where(model.id > last_id, *conditions).order_by(model.id).limit(batch_size)
+            result = await db.execute(query)
+            ids = result.scalars().all()
+            
+            if not ids:
+                return
+            
+            yield db, ids
+            await db.commit()
+        
+        last_id = ids[-1]
@@ -0,0 +1,37 @@
+"""
+Recomputes every user embedding from scratch (interests plus joined activities), correcting
+the drift that incremental updates accumulate, e.g. from float rounding or activities whose
+tags changed after the user joined. Meant to run nightly, e.g. from cron.
+
+Usage (from the repository root):
+    python -m backend.jobs.compact_user_embeddings [--batch-size N]
+"""
+import argparse
+import asyncio
+import logging
+
+from ..core.config import settings
+from ..models.user import User
+from ..services.user_embedding import UserEmbeddingService
+from .batches import id_batches
+
+logger = logging.getLogger(__name__)
+
+async def run(batch_size: int) -> None:
+    total = 0
+    async for db, ids in id_batches(User, batch_size):
+        await UserEmbeddingService.recompute_users(db, ids)
+        total += len(ids)
+    
+    logger.info("Compacted %d user embeddings", total)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute user embeddings from scratch")
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.batch_size))
+
+if __name__ == "__main__":
+    main()
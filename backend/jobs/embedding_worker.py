@@ -0,0 +1,45 @@
+"""
+Background worker that fills in embeddings queued by writes when EMBEDDING_ASYNC is enabled.
+
+Usage (from the repository root):
+    python -m backend.jobs.embedding_worker [--once]
+"""
+import argparse
+import asyncio
+import logging
+
+from ..core.config import settings
+from ..core.database import AsyncSessionLocal
+from ..services.embedding import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+async def run(once: bool = False) -> None:
+    while True:
+        async with AsyncSessionLocal() as db:
+            try:
+                processed = await EmbeddingService.process_pending(db, settings.EMBEDDING_BATCH_SIZE)
+            except Exception:
+                logger.exception("Embedding batch failed")
+                processed = 0
+        
+        if processed:
+            logger.info("Embedded %d queued rows", processed)
+            continue
+        
+        if once:
+            return
+        
+        # Queue is empty, wait before polling again
+        await asyncio.sleep(settings.EMBEDDING_POLL_INTERVAL_SECONDS)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process queued embedding jobs")
+    parser.add_argument("--once", action="store_true", help="Exit once the queue is empty")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(once=args.once))
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,22 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from .core.metrics import MetricsMiddleware, render_prometheus
 from .routes.user import router as user_router
 from .routes.auth import router as auth_router
 from .routes.activity import router as activity_router
 
 app = FastAPI(title="Uplink")
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(user_router)
 app.include_router(auth_router)
 app.include_router(activity_router)
 
 @app.get("/health", tags=["Health"])
 def health_check():
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
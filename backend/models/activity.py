@@ -1,10 +1,17 @@
-from ..core.database import Base
-from sqlalchemy import Column, ForeignKey, String, Integer, Text, func, text
+from ..core.database import Base, embedding_type
+from sqlalchemy import Column, Float, ForeignKey, Index, String, Integer, Text, func, text
 from sqlalchemy.dialects.postgresql import BIGINT, JSONB, TIMESTAMP
-from pgvector.sqlalchemy import Vector
 
 class Activity(Base):
     __tablename__ = "activities"
+    __table_args__ = (
+        # Only upcoming activities are scanned by recommendations, past ones are archived
+        Index("ix_activities_active_date_time", "date_time", postgresql_where=text("status = 'active'")),
+        # Prefix scans for proximity queries, see core/geo.py
+        Index("ix_activities_geohash", "geohash", postgresql_ops={"geohash": "varchar_pattern_ops"}),
+        # participants @> [user_id] lookups when recomputing user embeddings
+        Index("ix_activities_participants", "participants", postgresql_using="gin", postgresql_ops={"participants": "jsonb_path_ops"}),
+    )
     
     id = Column(BIGINT, primary_key=True, index=True)
     host_id = Column(BIGINT, ForeignKey("users.id"), nullable=False, index=True)
@@ -12,9 +19,39 @@ class Activity(Base):
     description = Column(Text, nullable=False, server_default=text("''::text"))
     tags = Column(JSONB, nullable=False, server_default=text("'[]'::jsonb"))
     location = Column(String, nullable=False)
+    # Resolved from location by the offline gazetteer, NULL when the location is unknown
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String, nullable=True)
     date_time = Column(TIMESTAMP(timezone=True), nullable=False)
     max_participants = Column(Integer, nullable=False)
     participants = Column(JSONB, nullable=False, server_default=text("'[]'::jsonb"))    
     status = Column(String, nullable=False, server_default=text("'active'"))
-    embedding = Column(Vector(384), nullable=True)
+    embedding = Column(embedding_type(), nullable=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+class ActivityArchive(Base):
+    """
+    Finished activities moved out of the hot table by jobs/archive_activities.py --move.
+    """
+    __tablename__ = "activities_archive"
+    __table_args__ = (
+        Index("ix_activities_archive_participants", "participants", postgresql_using="gin", postgresql_ops={"participants": "jsonb_path_ops"}),
+    )
+    
+    id = Column(BIGINT, primary_key=True)
+    host_id = Column(BIGINT, nullable=False, index=True)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=False)
+    tags = Column(JSONB, nullable=False)
+    location = Column(String, nullable=False)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String, nullable=True)
+    date_time = Column(TIMESTAMP(timezone=True), nullable=False)
+    max_participants = Column(Integer, nullable=False)
+    participants = Column(JSONB, nullable=False)
+    status = Column(String, nullable=False)
+    embedding = Column(embedding_type(), nullable=True)
+    created_at = Column(TIMESTAMP(timezone=True))
+    archived_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -0,0 +1,16 @@
+from ..core.database import Base
+from sqlalchemy import Column, Integer, String, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import BIGINT, TIMESTAMP
+
+class EmbeddingJob(Base):
+    __tablename__ = "embedding_jobs"
+    __table_args__ = (
+        # A row is queued at most once, re-enqueueing an already pending row is a no-op
+        UniqueConstraint("entity_type", "entity_id", name="uq_embedding_jobs_entity"),
+    )
+    
+    id = Column(BIGINT, primary_key=True, index=True)
+    entity_type = Column(String, nullable=False)
+    entity_id = Column(BIGINT, nullable=False)
+    attempts = Column(Integer, nullable=False, server_default="0")
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
\ No newline at end of file
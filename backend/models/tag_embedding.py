@@ -0,0 +1,11 @@
+from ..core.database import Base, embedding_type
+from sqlalchemy import Column, String
+
+class TagEmbedding(Base):
+    """
+    Cached embedding of a single interest/tag, so user embeddings can be updated without the model.
+    """
+    __tablename__ = "tag_embeddings"
+    
+    tag = Column(String, primary_key=True)
+    embedding = Column(embedding_type(), nullable=False)
\ No newline at end of file
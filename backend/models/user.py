@@ -1,10 +1,14 @@
-from ..core.database import Base
-from sqlalchemy import Column, String, Text, func, text
+from ..core.database import Base, embedding_cosine_ops, embedding_type
+from sqlalchemy import Column, Float, Index, String, Text, func, text
 from sqlalchemy.dialects.postgresql import BIGINT, JSONB, TIMESTAMP
-from pgvector.sqlalchemy import Vector
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Approximate nearest neighbour search for GET /users/me/similar
+        Index("ix_users_embedding_hnsw", "embedding", postgresql_using="hnsw", postgresql_ops={"embedding": embedding_cosine_ops()}),
+        Index("ix_users_country_city", "country", "city"),
+    )
     
     id = Column(BIGINT, primary_key=True, index=True)
     email = Column(String, nullable=False, unique=True)
@@ -15,5 +19,8 @@ class User(Base):
     bio = Column(Text, nullable=True, server_default=text("''::text"))
     country = Column(String, nullable=True)
     city = Column(String, nullable=True)
-    embedding = Column(Vector(384), nullable=True)
+    # Weighted sum of interest and joined activity vectors (cosine ignores scale) and its total weight,
+    # see services/user_embedding.py. NULL weight means the embedding needs a full recompute
+    embedding = Column(embedding_type(), nullable=True)
+    embedding_weight = Column(Float, nullable=True)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
\ No newline at end of file
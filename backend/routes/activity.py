@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.admission import admission
 from ..core.database import get_db
 from ..schemas.activity import ActivityCreate, ActivityRead, ActivityUpdate, ActivityDelete, ActivityJoinResponse, ActivitySimilarity
 from ..services.activity import ActivityService
@@ -11,20 +12,20 @@ router = APIRouter(prefix="/activities", tags=["activities"])
 
 security = HTTPBearer()
 
-@router.post("", response_model=ActivityRead)
+@router.post("", response_model=ActivityRead, dependencies=[Depends(admission("create_activity"))])
 async def create_activity(activity_data: ActivityCreate, token: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_db)) -> ActivityRead:
     current_user = await AuthService.get_current_user(db, token.credentials)
     return await ActivityService.create_activity(db, activity_data, current_user.id)
 
 @router.get("", response_model=list[ActivityRead])
-async def get_activities(skip: int = 0, limit: int = 50, db: AsyncSession = Depends(get_db)) -> list[ActivityRead]:
-    return await ActivityService.get_activities(db, skip=skip, limit=limit)
+async def get_activities(skip: int = 0, limit: int = 50, near: str | None = None, radius_km: float = 10, db: AsyncSession = Depends(get_db)) -> list[ActivityRead]:
+    return await ActivityService.get_activities(db, skip=skip, limit=limit, near=near, radius_km=radius_km)
 
 @router.get("/{activity_id}", response_model=ActivityRead)
 async def get_activity_by_id(activity_id: int, db: AsyncSession = Depends(get_db)) -> ActivityRead:
     return await ActivityService.get_activity_by_id(db, activity_id)
 
-@router.put("/{activity.id}", response_model=ActivityRead)
+@router.put("/{activity.id}", response_model=ActivityRead, dependencies=[Depends(admission("update_activity"))])
 async def update_activity_by_id(activity_id: int, activity_data: ActivityUpdate, token: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_db)) -> ActivityRead:
     current_user = await AuthService.get_current_user(db, token.credentials)
     return await ActivityService.update_activity_by_id(db, activity_id, activity_data, current_user.id)
@@ -55,6 +56,6 @@ async def leave_activity(activity_id: int, token: HTTPAuthorizationCredentials =
     return await ActivityService.leave_activity(db, activity_id, current_user.id)
 
 @router.get("/me/recommend", response_model=list[ActivitySimilarity])
-async def recommend_activities(limit: int = 5, token: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_db)) -> list[ActivitySimilarity]:
+async def recommend_activities(limit: int = 5, near: str | None = None, radius_km: float = 10, token: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_db)) -> list[ActivitySimilarity]:
     current_user = await AuthService.get_current_user(db, token.credentials)
-    return await ActivityService.recommend_activities(db, current_user.id, limit=limit)
\ No newline at end of file
+    return await ActivityService.recommend_activities(db, current_user.id, limit=limit, near=near, radius_km=radius_km)
\ No newline at end of file
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.admission import admission
 from ..core.database import get_db
 from ..schemas.user import UserCreate, UserRead
 from ..schemas.auth import UserLogin, Token
@@ -12,11 +13,11 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 # Checks for token
 security = HTTPBearer() 
 
-@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
+@router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED, dependencies=[Depends(admission("register"))])
 async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)) -> Token:
     return await AuthService.register_user(db, user_data)
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(admission("login"))])
 async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)) -> Token:
     return await AuthService.login_user(db, credentials)
 
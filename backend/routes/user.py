@@ -1,13 +1,18 @@
 from fastapi import APIRouter, Depends, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.admission import admission
 from ..core.database import get_db
-from ..schemas.user import UserCreate, UserRead, UserUpdate, UserDelete
+from ..schemas.user import UserCreate, UserRead, UserUpdate, UserDelete, UserSimilarity
+from ..services.auth import AuthService
 from ..services.user import UserService
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-@router.post("", response_model=UserRead, status_code=status.HTTP_201_CREATED)
+security = HTTPBearer()
+
+@router.post("", response_model=UserRead, status_code=status.HTTP_201_CREATED, dependencies=[Depends(admission("create_user"))])
 async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_db)) -> UserRead:
     return await UserService.create_user(db, user_data)
 
@@ -15,6 +20,11 @@ async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_db))
 async def get_users(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)) -> list[UserRead]:
     return await UserService.get_users(db, skip=skip, limit=limit)
 
+@router.get("/me/similar", response_model=list[UserSimilarity])
+async def get_similar_users(limit: int = 10, city: str | None = None, country: str | None = None, token: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_db)) -> list[UserSimilarity]:
+    current_user = await AuthService.get_current_user(db, token.credentials)
+    return await UserService.get_similar_users(db, current_user, limit=limit, city=city, country=country)
+
 @router.get("/id/{user_id}", response_model=UserRead)
 async def get_user_by_id(user_id: int, db: AsyncSession = Depends(get_db)) -> UserRead:
     return await UserService.get_user_by_id(db, user_id)
@@ -23,7 +33,7 @@ async def get_user_by_id(user_id: int, db: AsyncSession = Depends(get_db)) -> Us
 async def get_user_by_username(username: str, db: AsyncSession = Depends(get_db)) -> UserRead:
     return await UserService.get_user_by_username(db, username)
 
-@router.put("/{user_id}", response_model=UserRead)
+@router.put("/{user_id}", response_model=UserRead, dependencies=[Depends(admission("update_user"))])
 async def update_user_by_id(user_id: int, user_data:UserUpdate, db: AsyncSession = Depends(get_db)) -> UserRead:
     return await UserService.update_user_by_id(db, user_id, user_data)
 
@@ -17,6 +17,8 @@ class ActivityRead(ActivityBase):
     host_id: int
     participants: list[int]
     status: str
+    latitude: float | None = None
+    longitude: float | None = None
     created_at: datetime
     
     class Config:
@@ -31,4 +31,13 @@ class UserUpdate(BaseModel, UserValidatorsMixin):
     city: str | None = None
 
 class UserDelete(BaseModel):
-    message: str
\ No newline at end of file
+    message: str
+
+class UserSimilarity(BaseModel):
+    user_id: int
+    username: str
+    full_name: str
+    interests: list[str]
+    country: str | None
+    city: str | None
+    similarity: float
\ No newline at end of file
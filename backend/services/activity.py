@@ -1,15 +1,24 @@
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, or_, select, union_all, update
+from sqlalchemy.orm import defer
+from datetime import datetime, timezone
+from ..core.config import settings
 from ..core.embedding_model import get_embeddings
-from ..models.activity import Activity
+from ..core import geo
+from ..models.activity import Activity, ActivityArchive
 from ..models.user import User
 from ..schemas.activity import ActivityCreate, ActivityRead, ActivityUpdate, ActivityDelete, ActivityJoinResponse, ActivitySimilarity
-import numpy as np
+from .embedding import EmbeddingService
+from .user import UserService
+from .user_embedding import UserEmbeddingService
+import math
 
 class ActivityService:
     async def create_activity(db: AsyncSession, activity_data: ActivityCreate, host_id: int) -> ActivityRead:
-        activity_embedding = get_embeddings(activity_data.tags)
+        # With EMBEDDING_ASYNC the embedding is filled in later by the worker
+        activity_embedding = None if settings.EMBEDDING_ASYNC else await run_in_threadpool(get_embeddings, activity_data.tags)
         
         new_activity = Activity(
             host_id=host_id,
@@ -23,21 +32,30 @@ class ActivityService:
             status="active",
             embedding=activity_embedding
         )
+        ActivityService.set_coordinates(new_activity)
         
         db.add(new_activity)
+        
+        if settings.EMBEDDING_ASYNC:
+            await db.flush()
+            await EmbeddingService.enqueue(db, EmbeddingService.ACTIVITY, new_activity.id)
+        
         await db.commit()
         await db.refresh(new_activity)
         
         return new_activity
     
-    async def get_activities(db: AsyncSession, skip: int = 0, limit: int = 50) -> list[ActivityRead]:
+    async def get_activities(db: AsyncSession, skip: int = 0, limit: int = 50, near: str | None = None, radius_km: float = 10) -> list[ActivityRead]:
         if limit > 50:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Limit cannot exceed 50"
             )
         
-        query = select(Activity).offset(skip).limit(limit)
+        query = select(Activity)
+        if near is not None:
+            query = query.where(*ActivityService.near_conditions(near, radius_km))
+        query = query.offset(skip).limit(limit)
         result = await db.execute(query)
         activities = result.scalars().all()
         
@@ -48,6 +66,11 @@ class ActivityService:
         result = await db.execute(query)
         activity = result.scalar_one_or_none()
         
+        # Finished activities may have been moved out by jobs/archive_activities.py --move
+        if not activity:
+            result = await db.execute(select(ActivityArchive).where(ActivityArchive.id == activity_id))
+            activity = result.scalar_one_or_none()
+        
         if not activity:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -88,8 +111,16 @@ class ActivityService:
         for field, value in update_data.items():
             setattr(activity, field, value)
         
+        if 'location' in update_data:
+            ActivityService.set_coordinates(activity)
+        
         if 'tags' in update_data:
-            activity.embedding = get_embeddings(update_data['tags'])
+            if settings.EMBEDDING_ASYNC:
+                activity.embedding = None
+                await db.flush()
+                await EmbeddingService.enqueue(db, EmbeddingService.ACTIVITY, activity.id)
+            else:
+                activity.embedding = await run_in_threadpool(get_embeddings, update_data['tags'])
         
         await db.commit()
         await db.refresh(activity)
@@ -119,27 +150,40 @@ class ActivityService:
         return ActivityDelete(message=f"Activity '{activity.title}' deleted successfully")
     
     async def get_activities_by_host(db: AsyncSession, host_id: int, skip: int = 0, limit: int = 50) -> list[ActivityRead]:
-        query = select(Activity).where(Activity.host_id == host_id)
-        query = query.order_by(Activity.created_at.desc())
+        activities = ActivityService.including_archive(lambda model: model.host_id == host_id)
+        query = select(activities).order_by(activities.c.created_at.desc())
         query = query.offset(skip).limit(limit)
         
         result = await db.execute(query)
-        activities = result.scalars().all()
+        activities = result.all()
         
         return activities
     
     async def get_activities_joined_by_user(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 50) -> list[ActivityRead]:
-        query = select(Activity).where(Activity.participants.op('@>')([user_id]))
-        query = query.order_by(Activity.date_time.asc())
+        activities = ActivityService.including_archive(lambda model: model.participants.op('@>')([user_id]))
+        query = select(activities).order_by(activities.c.date_time.asc())
         query = query.offset(skip).limit(limit)
         
         result = await db.execute(query)
-        activities = result.scalars().all()
+        activities = result.all()
         
         return activities
     
+    def including_archive(where):
+        """
+        Rows of activities and activities_archive matching where(model), as one subquery,
+        so history listings keep finished activities moved out by the archival job.
+        """
+        columns = [column.name for column in Activity.__table__.columns if column.name != "embedding"]
+        parts = [
+            select(*[getattr(model, name) for name in columns]).where(where(model))
+            for model in (Activity, ActivityArchive)
+        ]
+        return union_all(*parts).subquery()
+    
     async def join_activity(db: AsyncSession, activity_id: int, user_id: int) -> ActivityJoinResponse:
-        query = select(Activity).where(Activity.id == activity_id)
+        # Row lock so concurrent joins can't both pass the capacity check or overwrite each other's participants
+        query = select(Activity).where(Activity.id == activity_id).with_for_update()
         result = await db.execute(query)
         activity = result.scalar_one_or_none()
         
@@ -179,13 +223,17 @@ class ActivityService:
         
         activity.participants = activity.participants + [user_id]
         
+        # Joining pulls the user's embedding towards the activity, without a model call
+        await UserEmbeddingService.apply_activity(db, user_id, activity, 1)
+        UserService.invalidate_similar_users(user_id)
+        
         await db.commit()
         await db.refresh(activity)
         
         return ActivityJoinResponse(message="Successfully joined activity")
     
     async def leave_activity(db: AsyncSession, activity_id: int, user_id: int) -> ActivityJoinResponse:
-        query = select(Activity).where(Activity.id == activity_id)
+        query = select(Activity).where(Activity.id == activity_id).with_for_update()
         result = await db.execute(query)
         activity = result.scalar_one_or_none()
         
@@ -204,28 +252,40 @@ class ActivityService:
         # Remove user from participants
         activity.participants = [pid for pid in activity.participants if pid != user_id]
         
+        await UserEmbeddingService.apply_activity(db, user_id, activity, -1)
+        UserService.invalidate_similar_users(user_id)
+        
         await db.commit()
         await db.refresh(activity)
         
         return ActivityJoinResponse(message="Successfully left activity")
     
-    async def recommend_activities(db: AsyncSession, user_id: int, limit: int) -> list[ActivitySimilarity]:
+    async def recommend_activities(db: AsyncSession, user_id: int, limit: int, near: str | None = None, radius_km: float = 10) -> list[ActivitySimilarity]:
         result = await db.execute(select(User).where(User.id == user_id))
         user = result.scalar_one_or_none()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
     
-        result = await db.execute(select(Activity).where(Activity.status == "active"))
-        activities = result.scalars().all()
-        
-        scores = []
-        
-        for activity in activities:
-            score = ActivityService.cosine_similarity(user.embedding, activity.embedding)
-            scores.append((activity, score))
-        
-        scores.sort(key=lambda x: x[1], reverse=True)
-        top = scores[:limit]
+        # Past activities not archived yet are skipped, this range also matches ix_activities_active_date_time
+        upcoming = (Activity.status == "active", Activity.date_time >= datetime.now(timezone.utc))
+        if near is not None:
+            upcoming += tuple(ActivityService.near_conditions(near, radius_km))
+        
+        # The user's embedding is still queued: fall back to the soonest activities
+        if user.embedding is None:
+            query = select(Activity).where(*upcoming)
+            query = query.order_by(Activity.date_time.asc()).limit(limit)
+            result = await db.execute(query)
+            top = [(activity, 0.0) for activity in result.scalars().all()]
+        else:
+            # Scored in the database on the stored (possibly half precision) vectors, so only the top rows
+            # are sent back. Activities whose embedding is still queued can't be scored yet
+            distance = Activity.embedding.cosine_distance(user.embedding)
+            query = select(Activity, 1 - distance).where(*upcoming, Activity.embedding.is_not(None))
+            query = query.options(defer(Activity.embedding))
+            query = query.order_by(distance).limit(limit)
+            result = await db.execute(query)
+            top = result.all()
         
         return [
             ActivitySimilarity(
@@ -241,12 +301,85 @@ class ActivityService:
             for activity, similarity in top
         ]
         
-    def cosine_similarity(vec1: list[float], vec2: list[float]) -> float:
-        v1 = np.array(vec1)
-        v2 = np.array(vec2)
+    async def finish_past_activities(db: AsyncSession, batch_size: int) -> int:
+        """
+        Marks up to batch_size active activities whose date_time has passed as finished.
+        Returns the number of updated rows, keep calling until it returns 0.
+        """
+        past = select(Activity.id).where(Activity.status == "active", Activity.date_time < datetime.now(timezone.utc))
+        past = past.limit(batch_size).with_for_update(skip_locked=True)
+        
+        query = update(Activity).where(Activity.id.in_(past.scalar_subquery())).values(status="finished")
+        result = await db.execute(query.execution_options(synchronize_session=False))
+        await db.commit()
+        
+        return result.rowcount
+    
+    async def move_finished_activities(db: AsyncSession, batch_size: int) -> int:
+        """
+        Moves up to batch_size finished activities to activities_archive in a single statement.
+        Returns the number of moved rows, keep calling until it returns 0.
+        """
+        columns = [column.name for column in Activity.__table__.columns]
+        
+        finished = select(Activity.id).where(Activity.status == "finished")
+        finished = finished.limit(batch_size).with_for_update(skip_locked=True)
+        
+        moved = delete(Activity).where(Activity.id.in_(finished.scalar_subquery()))
+        moved = moved.returning(*Activity.__table__.columns).cte("moved")
+        
+        query = insert(ActivityArchive).from_select(columns, select(*[moved.c[name] for name in columns]))
+        result = await db.execute(query)
+        await db.commit()
+        
+        return result.rowcount
+    
+    def set_coordinates(activity: Activity) -> None:
+        """
+        Fills latitude, longitude and geohash from the location using the offline gazetteer.
+        """
+        point = geo.lookup(activity.location)
+        if point is None:
+            activity.latitude = activity.longitude = activity.geohash = None
+            return
+        
+        activity.latitude, activity.longitude = point
+        activity.geohash = geo.encode_geohash(*point)
+    
+    def near_conditions(near: str, radius_km: float) -> list:
+        """
+        WHERE conditions for activities within radius_km of near ("lat,lon"): geohash prefixes
+        and a bounding box narrow the rows through indexes, then the exact distance is checked.
+        """
+        try:
+            latitude, longitude = geo.parse_point(near)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="near must be 'latitude,longitude'"
+            )
+        
+        if not 0 < radius_km <= 1000:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="radius_km must be between 0 and 1000"
+            )
+        
+        box = geo.bounding_box(latitude, longitude, radius_km)
+        min_lat, max_lat, min_lon, max_lon = box
+        conditions = [
+            Activity.latitude.between(min_lat, max_lat),
+            Activity.longitude.between(min_lon, max_lon),
+        ]
         
-        if np.linalg.norm(v1) == 0 or np.linalg.norm(v2) == 0:
-            return 0.0
+        cells = geo.covering_cells(box)
+        if cells:
+            conditions.append(or_(*[Activity.geohash.startswith(cell) for cell in cells]))
         
-        return float(np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2)))
+        # Great-circle distance (spherical law of cosines), clamped against rounding above 1
+        lat1, lat2 = func.radians(Activity.latitude), math.radians(latitude)
+        delta_lon = func.radians(Activity.longitude) - math.radians(longitude)
+        cosine = func.sin(lat1) * math.sin(lat2) + func.cos(lat1) * math.cos(lat2) * func.cos(delta_lon)
+        conditions.append(geo.EARTH_RADIUS_KM * func.acos(func.least(cosine, 1.0)) <= radius_km)
         
+        return conditions
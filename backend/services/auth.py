@@ -1,13 +1,16 @@
 
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from ..core.config import settings
-from ..core.embedding_model import get_embeddings
+from ..core.metrics import timed
 from ..models.user import User
 from ..schemas.user import UserCreate, UserRead
 from ..schemas.auth import UserLogin, Token
+from .embedding import EmbeddingService
+from .user_embedding import UserEmbeddingService
 import bcrypt
 import jwt
 
@@ -36,8 +39,12 @@ class AuthService:
                     detail="Username already taken"
                 )
                 
-        hashed_password = bcrypt.hashpw(user_data.password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-        user_embedding = get_embeddings(user_data.interests)
+        # bcrypt runs in the threadpool so it doesn't block the event loop
+        hashed_password = await run_in_threadpool(AuthService.hash_password, user_data.password)
+        # With EMBEDDING_ASYNC the embedding is filled in later by the worker
+        user_embedding, user_embedding_weight = None, None
+        if not settings.EMBEDDING_ASYNC:
+            user_embedding, user_embedding_weight = await UserEmbeddingService.build(db, user_data.interests)
 
         new_user = User(
             email=user_data.email,
@@ -48,10 +55,16 @@ class AuthService:
             bio=user_data.bio,
             country=user_data.country,
             city=user_data.city,
-            embedding=user_embedding
+            embedding=user_embedding,
+            embedding_weight=user_embedding_weight
         )
         
         db.add(new_user)
+        
+        if settings.EMBEDDING_ASYNC:
+            await db.flush()
+            await EmbeddingService.enqueue(db, EmbeddingService.USER, new_user.id)
+        
         await db.commit()
         await db.refresh(new_user)
         
@@ -135,10 +148,15 @@ class AuthService:
         
         if not user:
             return None
-        if not AuthService.verify_password(credentials.password, user.hashed_password):
+        if not await run_in_threadpool(AuthService.verify_password, credentials.password, user.hashed_password):
             return None
         
         return user
         
+    def hash_password(plain_password: str) -> str:
+        with timed("bcrypt_seconds"):
+            return bcrypt.hashpw(plain_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
\ No newline at end of file
+        with timed("bcrypt_seconds"):
+            return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
\ No newline at end of file
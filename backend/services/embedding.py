@@ -0,0 +1,163 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from ..core.embedding_model import get_embeddings_batch
+from ..models.activity import Activity
+from ..models.embedding_job import EmbeddingJob
+from ..models.user import User
+from .user_embedding import UserEmbeddingService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingService:
+    USER = "user"
+    ACTIVITY = "activity"
+    MAX_ATTEMPTS = 5
+    
+    MODELS = {
+        USER: User,
+        ACTIVITY: Activity,
+    }
+    
+    async def enqueue(db: AsyncSession, entity_type: str, entity_id: int) -> None:
+        """
+        Queues a row for the background worker. Does not commit, so the job is
+        only visible once the caller's transaction (which wrote the row) commits.
+        
+        Re-enqueueing a job given up on after MAX_ATTEMPTS resets its attempts, so it is
+        retried once the row is written again.
+        """
+        # DO NOTHING doesn't wait on a job a worker holds, while that worker may be waiting
+        # on the entity row the caller has just written (lock cycle)
+        query = insert(EmbeddingJob).values(entity_type=entity_type, entity_id=entity_id)
+        await db.execute(query.on_conflict_do_nothing(constraint="uq_embedding_jobs_entity"))
+        
+        # Given up jobs are never claimed, so this can't wait on a worker either
+        query = update(EmbeddingJob).where(
+            EmbeddingJob.entity_type == entity_type,
+            EmbeddingJob.entity_id == entity_id,
+            EmbeddingJob.attempts >= EmbeddingService.MAX_ATTEMPTS
+        ).values(attempts=0)
+        await db.execute(query.execution_options(synchronize_session=False))
+    
+    async def claim(db: AsyncSession, query) -> list[EmbeddingJob]:
+        query = query.where(EmbeddingJob.attempts < EmbeddingService.MAX_ATTEMPTS)
+        query = query.order_by(EmbeddingJob.id).with_for_update(skip_locked=True)
+        result = await db.execute(query)
+        return result.scalars().all()
+    
+    async def process_pending(db: AsyncSession, batch_size: int) -> int:
+        """
+        Claims up to batch_size jobs, encodes them with one model call and fills in
+        the embeddings. Returns the number of processed jobs.
+        
+        SKIP LOCKED lets several workers drain the queue without blocking each other.
+        The claimed jobs stay locked until the embeddings are committed. When the batch
+        fails its jobs are retried one at a time, so only the failing rows are charged
+        an attempt.
+        """
+        jobs = await EmbeddingService.claim(db, select(EmbeddingJob).limit(batch_size))
+        
+        if not jobs:
+            await db.rollback()
+            return 0
+        
+        job_ids = [job.id for job in jobs]
+        
+        try:
+            return await EmbeddingService.process_jobs(db, jobs)
+        except Exception:
+            logger.warning("Embedding batch failed, retrying its %d jobs one at a time", len(job_ids), exc_info=True)
+            await db.rollback()
+        
+        done = 0
+        for job_id in job_ids:
+            jobs = await EmbeddingService.claim(db, select(EmbeddingJob).where(EmbeddingJob.id == job_id))
+            if not jobs:
+                await db.rollback()
+                continue
+            
+            try:
+                done += await EmbeddingService.process_jobs(db, jobs)
+            except Exception:
+                await db.rollback()
+                await EmbeddingService.record_failure(db, job_id)
+        
+        return done
+    
+    async def process_jobs(db: AsyncSession, jobs: list[EmbeddingJob]) -> int:
+        """
+        Embeds the rows of the claimed jobs and deletes the jobs that are done. Commits.
+        """
+        done_ids = []
+        for entity_type in EmbeddingService.MODELS:
+            typed_jobs = [job for job in jobs if job.entity_type == entity_type]
+            if not typed_jobs:
+                continue
+            
+            handled = await EmbeddingService.embed(db, entity_type, [job.entity_id for job in typed_jobs])
+            done_ids += [job.id for job in typed_jobs if job.entity_id in handled]
+        
+        await db.execute(delete(EmbeddingJob).where(EmbeddingJob.id.in_(done_ids)))
+        await db.commit()
+        
+        return len(done_ids)
+    
+    async def record_failure(db: AsyncSession, job_id: int) -> None:
+        """
+        Charges a failed job an attempt. After MAX_ATTEMPTS it is no longer claimed,
+        so one bad row can't block the queue.
+        """
+        query = update(EmbeddingJob).where(EmbeddingJob.id == job_id).values(attempts=EmbeddingJob.attempts + 1)
+        query = query.returning(EmbeddingJob.entity_type, EmbeddingJob.entity_id, EmbeddingJob.attempts)
+        result = await db.execute(query)
+        row = result.one_or_none()
+        await db.commit()
+        
+        if row is None:
+            return
+        
+        if row.attempts >= EmbeddingService.MAX_ATTEMPTS:
+            logger.error("Giving up on embedding %s %d after %d attempts", row.entity_type, row.entity_id, row.attempts, exc_info=True)
+        else:
+            logger.warning("Embedding %s %d failed (attempt %d)", row.entity_type, row.entity_id, row.attempts, exc_info=True)
+    
+    async def embed(db: AsyncSession, entity_type: str, ids: list[int]) -> set[int]:
+        """
+        Re-computes the embeddings of the given rows, see embed_rows. Does not commit.
+        """
+        # Users also carry their joined activities, see UserEmbeddingService
+        if entity_type == EmbeddingService.USER:
+            return await UserEmbeddingService.recompute_users(db, ids)
+        return await EmbeddingService.embed_rows(db, Activity, "tags", ids)
+    
+    async def embed_rows(db: AsyncSession, model, source: str, ids: list[int]) -> set[int]:
+        """
+        Re-computes the embeddings of the given rows. Does not commit.
+        
+        Returns the ids that no longer need work: rows that were updated and rows that
+        no longer exist. A row whose source changed while the model was running is
+        left out so its job is picked up again.
+        """
+        source_column = getattr(model, source)
+        result = await db.execute(select(model.id, source_column).where(model.id.in_(ids)))
+        rows = result.all()
+        
+        # Missing rows and rows with nothing to embed need no further work
+        handled = set(ids) - {row[0] for row in rows if row[1]}
+        rows = [row for row in rows if row[1]]
+        
+        if not rows:
+            return handled
+        
+        embeddings = get_embeddings_batch([row[1] for row in rows])
+        
+        for (row_id, values), embedding in zip(rows, embeddings):
+            query = update(model).where(model.id == row_id, source_column == values).values(embedding=embedding)
+            query = query.execution_options(synchronize_session=False)
+            result = await db.execute(query)
+            if result.rowcount:
+                handled.add(row_id)
+        
+        return handled
\ No newline at end of file
@@ -1,12 +1,22 @@
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, text
 from ..models.user import User
-from ..schemas.user import UserCreate, UserRead, UserUpdate, UserDelete
-from ..core.embedding_model import get_embeddings
-import bcrypt
+from ..schemas.user import UserCreate, UserRead, UserUpdate, UserDelete, UserSimilarity
+from ..core.cache import TTLCache
+from ..core.config import settings
+from .auth import AuthService
+from .embedding import EmbeddingService
+from .user_embedding import UserEmbeddingService
 
 class UserService:
+    # (user_id, interests, city, country, limit) -> list[UserSimilarity]
+    # Keyed by the interests so a changed profile never hits an old entry, in any process
+    similar_users_cache = TTLCache(settings.SIMILAR_USERS_CACHE_SIZE, settings.SIMILAR_USERS_CACHE_TTL_SECONDS)
+    # hnsw.iterative_scan exists from pgvector 0.8, checked once per process
+    iterative_scan_supported: bool | None = None
+    
     async def create_user(db: AsyncSession, user_data: UserCreate) -> UserRead:
         existing_user_query = select(User).where(
             (User.email == user_data.email) | (User.username == user_data.username)
@@ -26,8 +36,11 @@ class UserService:
                     detail="Username already taken"
                 )
                 
-        hashed_password = bcrypt.hashpw(user_data.password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-        user_embedding = get_embeddings(user_data.interests)
+        hashed_password = await run_in_threadpool(AuthService.hash_password, user_data.password)
+        # With EMBEDDING_ASYNC the embedding is filled in later by the worker
+        user_embedding, user_embedding_weight = None, None
+        if not settings.EMBEDDING_ASYNC:
+            user_embedding, user_embedding_weight = await UserEmbeddingService.build(db, user_data.interests)
         
         new_user = User(
             email=user_data.email,
@@ -38,10 +51,16 @@ class UserService:
             bio=user_data.bio,
             country=user_data.country,
             city=user_data.city,
-            embedding=user_embedding
+            embedding=user_embedding,
+            embedding_weight=user_embedding_weight
         )
         
         db.add(new_user)
+        
+        if settings.EMBEDDING_ASYNC:
+            await db.flush()
+            await EmbeddingService.enqueue(db, EmbeddingService.USER, new_user.id)
+        
         await db.commit()
         await db.refresh(new_user)
         
@@ -87,7 +106,9 @@ class UserService:
         return db_users
     
     async def update_user_by_id(db: AsyncSession, user_id: int, user_data: UserUpdate) -> UserRead:
-        query = select(User).where(User.id == user_id)
+        # Locked and re-read (the session may already hold the user) so concurrent interest
+        # updates apply their deltas against the interests they actually replace
+        query = select(User).where(User.id == user_id).with_for_update().execution_options(populate_existing=True)
         result = await db.execute(query)
         db_user = result.scalar_one_or_none()
         
@@ -114,11 +135,20 @@ class UserService:
                     detail="Username already taken"
                 )
         
+        old_interests = list(db_user.interests)
+        
         for field, value in update_data.items():
             setattr(db_user, field, value)
         
         if 'interests' in update_data:
-            db_user.embedding = get_embeddings(update_data['interests'])
+            UserService.invalidate_similar_users(user_id)
+            await db.flush()
+            # Adds/removes only the changed interests' cached vectors, see UserEmbeddingService
+            if not await UserEmbeddingService.update_interests(db, db_user.id, old_interests, update_data['interests']):
+                db_user.embedding = None
+                db_user.embedding_weight = None
+                await db.flush()
+                await EmbeddingService.enqueue(db, EmbeddingService.USER, db_user.id)
         
         await db.commit()
         await db.refresh(db_user)
@@ -139,4 +169,70 @@ class UserService:
         await db.delete(db_user)
         await db.commit()
         
-        return UserDelete(message=f"User {user_id} deleted successfully")
\ No newline at end of file
+        return UserDelete(message=f"User {user_id} deleted successfully")
+    
+    async def supports_iterative_scan(db: AsyncSession) -> bool:
+        """
+        Whether the installed pgvector knows hnsw.iterative_scan (>= 0.8). Older versions reject the SET
+        and would abort the transaction.
+        """
+        if UserService.iterative_scan_supported is None:
+            result = await db.execute(text("SELECT extversion FROM pg_extension WHERE extname = 'vector'"))
+            version = result.scalar_one_or_none()
+            UserService.iterative_scan_supported = version is not None and tuple(int(part) for part in version.split(".")[:2]) >= (0, 8)
+        
+        return UserService.iterative_scan_supported
+    
+    async def get_similar_users(db: AsyncSession, user: User, limit: int = 10, city: str | None = None, country: str | None = None) -> list[UserSimilarity]:
+        if limit > 50:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Limit cannot exceed 50"
+            )
+        
+        # Embedding still queued for the background worker
+        if user.embedding is None:
+            return []
+        
+        cache_key = (user.id, tuple(user.interests), city, country, limit)
+        cached = UserService.similar_users_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        distance = User.embedding.cosine_distance(user.embedding)
+        query = select(User.id, User.username, User.full_name, User.interests, User.country, User.city, (1 - distance).label("similarity"))
+        query = query.where(User.id != user.id, User.embedding.is_not(None))
+        
+        # Filter candidates before ranking, the ORDER BY distance LIMIT is served by ix_users_embedding_hnsw
+        if city is not None:
+            query = query.where(User.city == city)
+        if country is not None:
+            query = query.where(User.country == country)
+        
+        query = query.order_by(distance).limit(limit)
+        
+        # The HNSW scan returns at most ef_search rows (default 40), below the allowed limit
+        await db.execute(text(f"SET LOCAL hnsw.ef_search = {max(limit, 40)}"))
+        if settings.SIMILAR_USERS_ITERATIVE_SCAN and await UserService.supports_iterative_scan(db):
+            await db.execute(text("SET LOCAL hnsw.iterative_scan = strict_order"))
+        
+        result = await db.execute(query)
+        similar_users = [
+            UserSimilarity(
+                user_id=row.id,
+                username=row.username,
+                full_name=row.full_name,
+                interests=row.interests,
+                country=row.country,
+                city=row.city,
+                similarity=row.similarity
+            )
+            for row in result.all()
+        ]
+        
+        UserService.similar_users_cache.set(cache_key, similar_users)
+        
+        return similar_users
+    
+    def invalidate_similar_users(user_id: int) -> None:
+        UserService.similar_users_cache.invalidate(lambda key: key[0] == user_id)
\ No newline at end of file
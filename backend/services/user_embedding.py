@@ -0,0 +1,174 @@
+from collections import Counter
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.database import EMBEDDING_DIMENSIONS, embedding_type
+from ..core.embedding_model import get_embeddings_batch
+from ..models.activity import Activity, ActivityArchive
+from ..models.tag_embedding import TagEmbedding
+from ..models.user import User
+import numpy as np
+
+def as_array(value) -> np.ndarray:
+    # vector columns come back as numpy arrays, halfvec columns as HalfVector
+    if hasattr(value, "to_numpy"):
+        value = value.to_numpy()
+    return np.asarray(value, dtype=np.float32)
+
+class UserEmbeddingService:
+    """
+    User embeddings are kept as a weighted sum plus its total weight:
+        embedding = sum(interest tag vectors) + JOIN_WEIGHT * sum(joined activity embeddings)
+    Since the tag vectors are the ones get_embeddings averages, this ranks exactly like the
+    averaged interests embedding. Interest changes and joins/leaves add or subtract a delta
+    in a single UPDATE (O(d), no model call); compact_user_embeddings recomputes from scratch.
+    """
+    # tag -> vector, bounded process-local copy of tag_embeddings. Entries expire so a process
+    # that missed a model change (backfill_embeddings clears only its own copy) converges
+    tag_cache = TTLCache(settings.TAG_EMBEDDING_CACHE_SIZE, settings.TAG_EMBEDDING_CACHE_TTL_SECONDS)
+    
+    async def tag_vectors(db: AsyncSession, tags: list[str], encode_missing: bool = True) -> dict[str, np.ndarray]:
+        """
+        Vectors of the given tags, from the process cache then tag_embeddings. Tags never seen
+        before are encoded in one model call and stored, unless encode_missing is False, in which
+        case they are left out of the result. Does not commit.
+        """
+        cache = UserEmbeddingService.tag_cache
+        vectors = {}
+        for tag in set(tags):
+            vector = cache.get(tag)
+            if vector is not None:
+                vectors[tag] = vector
+        # Sorted so concurrent inserts of the same new tags lock tag_embeddings keys in the same order
+        missing = sorted(tag for tag in set(tags) if tag not in vectors)
+        
+        if missing:
+            result = await db.execute(select(TagEmbedding.tag, TagEmbedding.embedding).where(TagEmbedding.tag.in_(missing)))
+            for tag, embedding in result.all():
+                vectors[tag] = as_array(embedding)
+                cache.set(tag, vectors[tag])
+            missing = [tag for tag in missing if tag not in vectors]
+        
+        if missing and encode_missing:
+            embeddings = await run_in_threadpool(get_embeddings_batch, [[tag] for tag in missing])
+            query = insert(TagEmbedding).values([
+                {"tag": tag, "embedding": embedding} for tag, embedding in zip(missing, embeddings)
+            ])
+            await db.execute(query.on_conflict_do_nothing())
+            for tag, embedding in zip(missing, embeddings):
+                vectors[tag] = np.asarray(embedding, dtype=np.float32)
+                cache.set(tag, vectors[tag])
+        
+        return vectors
+    
+    async def build(db: AsyncSession, interests: list[str]) -> tuple[list[float], float]:
+        """
+        Embedding and weight of a new user with the given interests.
+        """
+        vectors = await UserEmbeddingService.tag_vectors(db, interests)
+        return sum(vectors[tag] for tag in interests).tolist(), float(len(interests))
+    
+    async def apply_delta(db: AsyncSession, user_id: int, delta: np.ndarray, weight: float) -> bool:
+        """
+        Adds delta to the user's embedding and weight atomically. Returns False when the user
+        has no incremental embedding yet (NULL weight) and needs a full recompute. Does not commit.
+        """
+        query = update(User).where(User.id == user_id, User.embedding.is_not(None), User.embedding_weight.is_not(None))
+        query = query.values(
+            embedding=User.embedding.op("+")(literal(delta.tolist(), embedding_type())),
+            embedding_weight=User.embedding_weight + weight
+        )
+        result = await db.execute(query.execution_options(synchronize_session=False))
+        return bool(result.rowcount)
+    
+    async def update_interests(db: AsyncSession, user_id: int, old: list[str], new: list[str]) -> bool:
+        """
+        Moves the user's embedding from the old interests to the new ones. The new interests must
+        already be flushed. Returns False when that needs the model but EMBEDDING_ASYNC is set, so
+        the caller should queue the user instead. Does not commit.
+        """
+        added = Counter(new) - Counter(old)
+        removed = Counter(old) - Counter(new)
+        if not added and not removed:
+            return True
+        
+        changed = list(added | removed)
+        vectors = await UserEmbeddingService.tag_vectors(db, changed, encode_missing=not settings.EMBEDDING_ASYNC)
+        if len(vectors) < len(changed):
+            return False
+        
+        delta = sum(count * vectors[tag] for tag, count in added.items()) - sum(count * vectors[tag] for tag, count in removed.items())
+        weight = float(sum(added.values()) - sum(removed.values()))
+        
+        if await UserEmbeddingService.apply_delta(db, user_id, np.asarray(delta, dtype=np.float32), weight):
+            return True
+        
+        # No incremental embedding yet (created before it existed, or still queued)
+        if settings.EMBEDDING_ASYNC:
+            return False
+        await UserEmbeddingService.recompute_users(db, [user_id])
+        return True
+    
+    async def apply_activity(db: AsyncSession, user_id: int, activity: Activity, sign: int) -> None:
+        """
+        Adds (sign=1, join) or removes (sign=-1, leave) a joined activity from the user's embedding.
+        Users without an incremental embedding are left for the compaction job. Does not commit.
+        """
+        weight = settings.USER_EMBEDDING_JOIN_WEIGHT
+        if not weight or activity.embedding is None:
+            return
+        
+        await UserEmbeddingService.apply_delta(db, user_id, sign * weight * as_array(activity.embedding), sign * weight)
+    
+    async def recompute_users(db: AsyncSession, ids: list[int]) -> set[int]:
+        """
+        Recomputes the embeddings of the given users from their interests and joined activities
+        (archived ones included). Returns the ids that no longer need work, like
+        EmbeddingService.embed_rows. Does not commit.
+        """
+        result = await db.execute(select(User.id, User.interests).where(User.id.in_(ids)))
+        rows = result.all()
+        handled = set(ids) - {row.id for row in rows}
+        
+        if not rows:
+            return handled
+        
+        vectors = await UserEmbeddingService.tag_vectors(db, list({tag for row in rows for tag in row.interests}))
+        
+        user_ids = {row.id for row in rows}
+        joined_sum = {user_id: np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32) for user_id in user_ids}
+        joined_count = Counter()
+        join_weight = settings.USER_EMBEDDING_JOIN_WEIGHT
+        
+        if join_weight:
+            # One containment scan per table, served by the participants GIN (jsonb_path_ops) indexes
+            for model in (Activity, ActivityArchive):
+                query = select(model.participants, model.embedding).where(
+                    model.embedding.is_not(None),
+                    or_(*[model.participants.op("@>")([user_id]) for user_id in user_ids])
+                )
+                result = await db.execute(query)
+                for participants, embedding in result.all():
+                    vector = as_array(embedding)
+                    for user_id in user_ids.intersection(participants):
+                        joined_sum[user_id] += vector
+                        joined_count[user_id] += 1
+        
+        for row in rows:
+            total = sum((vectors[tag] for tag in row.interests), np.zeros(EMBEDDING_DIMENSIONS, dtype=np.float32))
+            total = total + join_weight * joined_sum[row.id]
+            weight = len(row.interests) + join_weight * joined_count[row.id]
+            
+            # Only overwrite if the interests didn't change in the meantime
+            query = update(User).where(User.id == row.id, User.interests == row.interests).values(
+                embedding=total.tolist() if weight else None,
+                embedding_weight=float(weight) if weight else None
+            )
+            result = await db.execute(query.execution_options(synchronize_session=False))
+            if result.rowcount:
+                handled.add(row.id)
+        
+        return handled
@@ -0,0 +1,56 @@
+"""
+Cosine agreement of the quantized ONNX backend with the PyTorch reference (see core/embedding_model.py).
+
+Skipped unless onnxruntime is installed (pip install "sentence-transformers[onnx]").
+Run from the repository root:
+    python -m pytest backend/tests
+"""
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+
+TAGS = [
+    "hiking", "running", "climbing", "yoga", "football", "chess", "board games", "photography",
+    "guitar", "jazz", "theatre", "poetry", "baking", "wine tasting", "languages", "volunteering",
+    "programming", "robotics", "astronomy", "gardening", "karaoke",
+]
+
+INTEREST_LISTS = [
+    ["hiking", "climbing"],
+    ["chess", "board games", "programming"],
+    ["jazz", "guitar", "karaoke", "theatre"],
+    ["baking", "wine tasting"],
+    ["astronomy", "robotics", "photography", "languages", "volunteering"],
+]
+
+# Same gate as benchmarks/embedding_backends.py --min-cosine
+MIN_COSINE = 0.99
+
+def cosine(expected: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    return np.sum(expected * actual, axis=1) / (np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1))
+
+@pytest.fixture(scope="module")
+def models():
+    # Settings are built on import and need these, nothing here touches the database
+    os.environ.setdefault("DATABASE_URL", "postgresql+asyncpg://localhost/unused")
+    os.environ.setdefault("JWT_SECRET_KEY", "unused")
+    from backend.core.embedding_model import load_model
+    
+    return load_model("torch"), load_model("onnx")
+
+def test_tag_embeddings_agree(models):
+    reference, candidate = models
+    agreement = cosine(reference.encode(TAGS), candidate.encode(TAGS))
+
+    assert agreement.mean() >= MIN_COSINE, dict(zip(TAGS, agreement.round(4)))
+
+def test_averaged_embeddings_agree(models):
+    # What get_embeddings returns for a user's or an activity's tags
+    reference, candidate = models
+    expected = np.array([np.mean(reference.encode(tags), axis=0) for tags in INTEREST_LISTS])
+    actual = np.array([np.mean(candidate.encode(tags), axis=0) for tags in INTEREST_LISTS])
+
+    assert cosine(expected, actual).mean() >= MIN_COSINE